@@ -19,8 +19,11 @@ class BathroomAutomation(AutomationPubSub):
     BATHROOM_MOTION_SENSOR = "Bathroom Motion Sensor"
     BATHROOM_DIMMER = "Bathroom Dimmer"
     COMMAND_TIMEOUT = 30
-    TOPICS = [f'{ROOT_TOPIC}/{BATHROOM_MOTION_SENSOR}',
-            f'{ROOT_TOPIC}/{BATHROOM_DIMMER}']
+    BATHROOM_MOTION_SENSOR_TOPIC = f'{ROOT_TOPIC}/{BATHROOM_MOTION_SENSOR}'
+    BATHROOM_DIMMER_TOPIC = f'{ROOT_TOPIC}/{BATHROOM_DIMMER}'
+    BATHROOM_DIMMER_SET_TOPIC = f'{BATHROOM_DIMMER_TOPIC}/set'
+    TOPICS = [BATHROOM_MOTION_SENSOR_TOPIC,
+            BATHROOM_DIMMER_TOPIC]
 
     def __init__(self, broker_ip:str, name:str):
         super().__init__(broker_ip,name)
@@ -49,13 +52,13 @@ class BathroomAutomation(AutomationPubSub):
     
         try:            
 
-            if topic == f'{self.ROOT_TOPIC}/{self.BATHROOM_MOTION_SENSOR}':
+            if topic == self.BATHROOM_MOTION_SENSOR_TOPIC:
                 if payload["occupancy"]:
                     self.set_light(status = True)
                 else: 
                     self.set_light(status = False)
 
-            if topic == f'{self.ROOT_TOPIC}/{self.BATHROOM_DIMMER}':
+            if topic == self.BATHROOM_DIMMER_TOPIC:
                 if payload["state"].lower() == "on":
                     self.light_status = True
                 if payload["state"].lower() == "off":
@@ -79,7 +82,7 @@ class BathroomAutomation(AutomationPubSub):
             command = '{"state":"OFF"}'
             self.command_status = False
         logging.debug(f'sending: {command}')
-        self.client.publish("zigbee2mqtt/Bathroom Dimmer/set",command)
+        self.client.publish(self.BATHROOM_DIMMER_SET_TOPIC,command)
         self.timer = threading.Timer(self.COMMAND_TIMEOUT,self.timeout)
         self.timer.start()
 
@@ -18,7 +18,8 @@ class BedLEDStripAutomation(AutomationPubSub):
     TIMEOUT = 180
     ROOT_TOPIC = "zigbee2mqtt"
     STORAGE_WINDOW_SENSOR = "Double Switch Bed"
-    TOPICS = [f'{ROOT_TOPIC}/{STORAGE_WINDOW_SENSOR}']
+    STORAGE_WINDOW_SENSOR_TOPIC = f'{ROOT_TOPIC}/{STORAGE_WINDOW_SENSOR}'
+    TOPICS = [STORAGE_WINDOW_SENSOR_TOPIC]
 
     def __init__(self, broker_ip:str, name:str):
         super().__init__(broker_ip,name)
@@ -36,7 +37,7 @@ class BedLEDStripAutomation(AutomationPubSub):
 
         
         """
-        if topic == f'{self.ROOT_TOPIC}/{self.STORAGE_WINDOW_SENSOR}':
+        if topic == self.STORAGE_WINDOW_SENSOR_TOPIC:
             try:            
                 if "single_right" == payload['action']:
                     self.toggle_bed_LED()
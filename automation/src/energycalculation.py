@@ -1,7 +1,22 @@
+import numpy as np
 import pandas as pd
-import json, pytz
+from numpy.lib.stride_tricks import sliding_window_view
+import pytz
 import time
 from datetime import datetime, timedelta
+
+try:
+    # orjson parses the raw file bytes directly and is considerably faster
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+try:
+    # The pyarrow CSV reader is multithreaded and several times faster than the C parser
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
 # from icecream import ic
 
 def load_csv(csv_file):
@@ -14,7 +29,7 @@ def load_csv(csv_file):
     Returns:
     pd.DataFrame: DataFrame with the 'Time' column as datetime objects.
     """
-    df = pd.read_csv(csv_file)
+    df = pd.read_csv(csv_file, engine=CSV_ENGINE)
     df['Time'] = pd.to_datetime(df['Time'])
  
     # If the times are known to be in a specific timezone, localize to that timezone
@@ -32,7 +47,7 @@ def load_json_from_string( json_data):
     Returns:
     pd.DataFrame: DataFrame with 'start_time' as UTC datetime objects.
     """
-    data = json.loads(json_data)
+    data = json_loads(json_data)
     df = pd.DataFrame(data)
     df['start_time'] = pd.to_datetime(df['start_time'], utc=True)
     return df
@@ -47,8 +62,8 @@ def load_json_from_file( json_file):
     Returns:
     pd.DataFrame: DataFrame with 'start_time' as UTC datetime objects.
     """
-    with open(json_file, 'r') as file:
-        data = json.load(file)
+    with open(json_file, 'rb') as file:
+        data = json_loads(file.read())
     df = pd.DataFrame(data)
     df['start_time'] = pd.to_datetime(df['start_time'], utc=True)
     return df
@@ -57,6 +72,11 @@ class EnergyPriceAnalyzer:
     """
     A class for analyzing energy prices and appliance profiles to find the cheapest operation period.
     """
+    # Resampled prices shared by every analyzer, keyed by price content and interval.
+    # Entries are treated as read-only.
+    RESAMPLE_CACHE_SIZE = 8
+    _resample_cache = {}
+
     def __init__(self, appliance_profile):
         """
         Initialize the EnergyPriceAnalyzer with appliance profile and price data.
@@ -93,6 +113,15 @@ class EnergyPriceAnalyzer:
         self._set_prices(prices)
 
         if self.appliance_profile is not None:
+            # The filtered prices already reflect the current time, so identical content
+            # at the same interval always resamples to the same result
+            key = (hash(pd.util.hash_pandas_object(self.prices, index=False).to_numpy().tobytes()),
+                   tuple(self.prices.columns), self.min_interval)
+            cache = EnergyPriceAnalyzer._resample_cache
+            if key in cache:
+                self.price_resampled = cache[key]
+                return
+
             # Resample price data
             self.price_resampled = self.prices.set_index('start_time').resample(self.min_interval).ffill()
 
@@ -100,6 +129,10 @@ class EnergyPriceAnalyzer:
             if isinstance(self.price_resampled.index, pd.MultiIndex):
                 self.price_resampled.index = self.price_resampled.index.get_level_values(0)
 
+            if len(cache) >= self.RESAMPLE_CACHE_SIZE:
+                cache.pop(next(iter(cache)))
+            cache[key] = self.price_resampled
+
     def _set_appliance_profile(self, appliance_profile):
         """
         Set the appliance profile data and calculate its minimum interval and total duration.
@@ -152,14 +185,15 @@ class EnergyPriceAnalyzer:
             print("No future price data available.")
             return None, None, None
 
-        # The above code is assigning the value of `self.price_resampled` to the variable `prices`.
-        prices = self.price_resampled
-        # keep oly the prices within the time frame that the machine should run 
-        if end_time is not None:
-            prices = prices[prices.index < pd.to_datetime(end_time)]
-            
-        if start_time is not None:
-            prices = prices[prices.index > pd.to_datetime(start_time)]
+        # keep only the prices within the time frame that the machine should run; the resampled
+        # index is sorted, so the bounds are binary searches instead of full boolean masks
+        index = self.price_resampled.index
+        first = 0 if start_time is None else index.searchsorted(pd.to_datetime(start_time), side='right')
+        last = len(index) if end_time is None else index.searchsorted(pd.to_datetime(end_time), side='left')
+        prices = self.price_resampled.iloc[first:last]
+
+        if prices.empty:
+            return None, None, None
       
 
         # Calculate the time difference in seconds (or another appropriate unit)
@@ -169,32 +203,50 @@ class EnergyPriceAnalyzer:
         self.energy_resampled = self.energy_resampled.shift(periods=time_diff_seconds, freq='s')
 
 
-        min_cost = float('inf')
-        max_cost = float('-inf')
-        cheapest_start = None
-
         # Ensure that there are enough data points to calculate 
         total_minutes = int((prices.index[-1] - prices.index[0]).total_seconds() / 60)
         total_minutes -= self.profile_duration
         if total_minutes < 0:
             return None, None, None
-        
-        for start_minute in range(total_minutes):
-            total_cost = self.calculate_cost(start_minute)
-            # ic(f'{prices.index[0]+timedelta(minutes=start_minute)}: {total_cost}')
-
-            if total_cost < min_cost:
-                min_cost = total_cost
-                cheapest_start = start_minute
-                
-            if total_cost > max_cost:
-                max_cost = total_cost
-
-        if cheapest_start is not None:
-            cheapest_start_time = prices.index[0] + pd.Timedelta(minutes=cheapest_start)
-            return cheapest_start_time, min_cost, max_cost
-
-        return None, None, None
+
+        # When a minute is a whole number of samples every shift lands on the price grid,
+        # so all candidate costs can be computed in one pass
+        step, remainder = divmod(pd.Timedelta(minutes=1), self.min_interval)
+        if remainder:
+            costs = np.array([self.calculate_cost(start_minute) for start_minute in range(total_minutes)])
+        else:
+            costs = self._shift_costs(prices.index[0], step, total_minutes)
+
+        if costs.size == 0:
+            return None, None, None
+
+        cheapest_start = int(costs.argmin())
+        cheapest_start_time = prices.index[0] + pd.Timedelta(minutes=cheapest_start)
+        return cheapest_start_time, float(costs[cheapest_start]), float(costs.max())
+
+    def _shift_costs(self, first_start, step, shifts):
+        """
+        Calculate the cost of every shift at once, as calculate_cost would for each of them.
+
+        Parameters:
+        first_start (pd.Timestamp): Start of the first candidate period, aligned with the appliance profile.
+        step (int): Number of price samples per minute.
+        shifts (int): Number of one minute shifts to evaluate.
+
+        Returns:
+        np.ndarray: Total cost for each shift.
+        """
+        start = self.price_resampled.index.get_loc(first_start)
+        # Missing samples count as zero, like the NaN-skipping sum in calculate_cost
+        price = np.nan_to_num(self.price_resampled['price_ct_per_kwh'].to_numpy(dtype=np.float64)[start:])
+        power = np.nan_to_num(self.energy_resampled['Power'].to_numpy(dtype=np.float64))
+
+        # No shift fits when the profile runs past the last price sample
+        if shifts <= 0 or price.size < power.size:
+            return np.empty(0)
+
+        windows = sliding_window_view(price, power.size)[::step][:shifts]
+        return windows @ power / 1000 / (3600 / int(self.min_interval.total_seconds()))
 
 
 string_prices = '[{"start_time": "2023-12-26T23:00:00+00:00", "end_time": "2023-12-27T00:00:00+00:00", "price_ct_per_kwh": 28.303109999999997}, {"start_time": "2023-12-27T00:00:00+00:00", "end_time": "2023-12-27T01:00:00+00:00", "price_ct_per_kwh": 27.0072}, {"start_time": "2023-12-27T01:00:00+00:00", "end_time": "2023-12-27T02:00:00+00:00", "price_ct_per_kwh": 24.39723}, {"start_time": "2023-12-27T02:00:00+00:00", "end_time": "2023-12-27T03:00:00+00:00", "price_ct_per_kwh": 23.7039}, {"start_time": "2023-12-27T03:00:00+00:00", "end_time": "2023-12-27T04:00:00+00:00", "price_ct_per_kwh": 23.477629999999998}, {"start_time": "2023-12-27T04:00:00+00:00", "end_time": "2023-12-27T05:00:00+00:00", "price_ct_per_kwh": 24.16491}, {"start_time": "2023-12-27T05:00:00+00:00", "end_time": "2023-12-27T06:00:00+00:00", "price_ct_per_kwh": 25.296259999999997}, {"start_time": "2023-12-27T06:00:00+00:00", "end_time": "2023-12-27T07:00:00+00:00", "price_ct_per_kwh": 26.81965}, {"start_time": "2023-12-27T07:00:00+00:00", "end_time": "2023-12-27T08:00:00+00:00", "price_ct_per_kwh": 27.43796}, {"start_time": "2023-12-27T08:00:00+00:00", "end_time": "2023-12-27T09:00:00+00:00", "price_ct_per_kwh": 27.16934}, {"start_time": "2023-12-27T09:00:00+00:00", "end_time": "2023-12-27T10:00:00+00:00", "price_ct_per_kwh": 26.485689999999998}, {"start_time": "2023-12-27T10:00:00+00:00", "end_time": "2023-12-27T11:00:00+00:00", "price_ct_per_kwh": 26.46391}, {"start_time": "2023-12-27T11:00:00+00:00", "end_time": "2023-12-27T12:00:00+00:00", "price_ct_per_kwh": 26.35259}, {"start_time": "2023-12-27T12:00:00+00:00", "end_time": "2023-12-27T13:00:00+00:00", "price_ct_per_kwh": 26.136}, {"start_time": "2023-12-27T13:00:00+00:00", "end_time": "2023-12-27T14:00:00+00:00", "price_ct_per_kwh": 26.3417}, {"start_time": "2023-12-27T14:00:00+00:00", "end_time": "2023-12-27T15:00:00+00:00", "price_ct_per_kwh": 27.104}, {"start_time": "2023-12-27T15:00:00+00:00", "end_time": "2023-12-27T16:00:00+00:00", "price_ct_per_kwh": 27.00236}, {"start_time": "2023-12-27T16:00:00+00:00", "end_time": "2023-12-27T17:00:00+00:00", "price_ct_per_kwh": 27.149980000000003}, {"start_time": "2023-12-27T17:00:00+00:00", "end_time": "2023-12-27T18:00:00+00:00", "price_ct_per_kwh": 26.42398}, {"start_time": "2023-12-27T18:00:00+00:00", "end_time": "2023-12-27T19:00:00+00:00", "price_ct_per_kwh": 25.2769}, {"start_time": "2023-12-27T19:00:00+00:00", "end_time": "2023-12-27T20:00:00+00:00", "price_ct_per_kwh": 24.04633}, {"start_time": "2023-12-27T20:00:00+00:00", "end_time": "2023-12-27T21:00:00+00:00", "price_ct_per_kwh": 20.41754}, {"start_time": "2023-12-27T21:00:00+00:00", "end_time": "2023-12-27T22:00:00+00:00", "price_ct_per_kwh": 19.47979}, {"start_time": "2023-12-27T22:00:00+00:00", "end_time": "2023-12-27T23:00:00+00:00", "price_ct_per_kwh": 17.4482}, {"start_time": "2023-12-27T23:00:00+00:00", "end_time": "2023-12-28T00:00:00+00:00", "price_ct_per_kwh": 17.42158}, {"start_time": "2023-12-28T00:00:00+00:00", "end_time": "2023-12-28T01:00:00+00:00", "price_ct_per_kwh": 17.329620000000002}, {"start_time": "2023-12-28T01:00:00+00:00", "end_time": "2023-12-28T02:00:00+00:00", "price_ct_per_kwh": 17.25097}, {"start_time": "2023-12-28T02:00:00+00:00", "end_time": "2023-12-28T03:00:00+00:00", "price_ct_per_kwh": 17.25581}, {"start_time": "2023-12-28T03:00:00+00:00", "end_time": "2023-12-28T04:00:00+00:00", "price_ct_per_kwh": 17.189259999999997}, {"start_time": "2023-12-28T04:00:00+00:00", "end_time": "2023-12-28T05:00:00+00:00", "price_ct_per_kwh": 17.29816}, {"start_time": "2023-12-28T05:00:00+00:00", "end_time": "2023-12-28T06:00:00+00:00", "price_ct_per_kwh": 17.339299999999998}, {"start_time": "2023-12-28T06:00:00+00:00", "end_time": "2023-12-28T07:00:00+00:00", "price_ct_per_kwh": 19.367259999999998}, {"start_time": "2023-12-28T07:00:00+00:00", "end_time": "2023-12-28T08:00:00+00:00", "price_ct_per_kwh": 22.0462}, {"start_time": "2023-12-28T08:00:00+00:00", "end_time": "2023-12-28T09:00:00+00:00", "price_ct_per_kwh": 22.11759}, {"start_time": "2023-12-28T09:00:00+00:00", "end_time": "2023-12-28T10:00:00+00:00", "price_ct_per_kwh": 21.005599999999998}, {"start_time": "2023-12-28T10:00:00+00:00", "end_time": "2023-12-28T11:00:00+00:00", "price_ct_per_kwh": 21.64569}, {"start_time": "2023-12-28T11:00:00+00:00", "end_time": "2023-12-28T12:00:00+00:00", "price_ct_per_kwh": 18.833650000000002}, {"start_time": "2023-12-28T12:00:00+00:00", "end_time": "2023-12-28T13:00:00+00:00", "price_ct_per_kwh": 18.8034}, {"start_time": "2023-12-28T13:00:00+00:00", "end_time": "2023-12-28T14:00:00+00:00", "price_ct_per_kwh": 20.614769999999996}, {"start_time": "2023-12-28T14:00:00+00:00", "end_time": "2023-12-28T15:00:00+00:00", "price_ct_per_kwh": 23.561120000000003}, {"start_time": "2023-12-28T15:00:00+00:00", "end_time": "2023-12-28T16:00:00+00:00", "price_ct_per_kwh": 22.36927}, {"start_time": "2023-12-28T16:00:00+00:00", "end_time": "2023-12-28T17:00:00+00:00", "price_ct_per_kwh": 26.910400000000003}, {"start_time": "2023-12-28T17:00:00+00:00", "end_time": "2023-12-28T18:00:00+00:00", "price_ct_per_kwh": 26.910400000000003}, {"start_time": "2023-12-28T18:00:00+00:00", "end_time": "2023-12-28T19:00:00+00:00", "price_ct_per_kwh": 25.291420000000002}, {"start_time": "2023-12-28T19:00:00+00:00", "end_time": "2023-12-28T20:00:00+00:00", "price_ct_per_kwh": 25.2769}, {"start_time": "2023-12-28T20:00:00+00:00", "end_time": "2023-12-28T21:00:00+00:00", "price_ct_per_kwh": 23.958}, {"start_time": "2023-12-28T21:00:00+00:00", "end_time": "2023-12-28T22:00:00+00:00", "price_ct_per_kwh": 22.264}, {"start_time": "2023-12-28T22:00:00+00:00", "end_time": "2023-12-28T23:00:00+00:00", "price_ct_per_kwh": 17.666}]'
@@ -1,13 +1,72 @@
 import time
-import json
 import logging
 import threading
 import socket
+from abc import ABC, abstractmethod
 import paho.mqtt.client as paho
-from json.decoder import JSONDecodeError
 import yaml  # Ensure yaml is imported for the read_config method
 
-class AutomationPubSub:
+try:
+    # libyaml bindings, several times faster than the pure Python loader
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+try:
+    # orjson parses the raw payload bytes directly and is considerably faster
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+class RearmableTimer:
+    """
+    Calls function(*args) once interval seconds have passed since the last start().
+    Starting again before that moves the deadline instead of spawning another
+    thread, so a single worker serves the timer for its whole life.
+    """
+    def __init__(self, function):
+        self.function = function
+        self._condition = threading.Condition()
+        self._deadline = None
+        self._args = ()
+        self._worker = None
+
+    def start(self, interval, args=()):
+        with self._condition:
+            self._deadline = time.monotonic() + interval
+            self._args = args
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+            self._condition.notify()
+
+    def cancel(self):
+        with self._condition:
+            self._deadline = None
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._deadline is None:
+                        self._condition.wait()
+                        continue
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                self._deadline = None
+                args = self._args
+            # Called without the lock so the function may start the timer again
+            try:
+                self.function(*args)
+            except Exception:
+                # Keep the worker alive; a failing call only loses that one event
+                logging.exception('Timer function %r failed', self.function)
+
+
+class AutomationPubSub(ABC):
     RECONNECTION_TIMER = 10
     def __init__(self, broker_ip:str, name:str):
         self.name = name
@@ -16,7 +75,7 @@ class AutomationPubSub:
         self.client.on_connect = self.on_connect
         self.client.on_disconnect = self.on_disconnect
         self.broker_ip = broker_ip
-        self.topics = []
+        self.topics = set()
         self._timer_reconnect = None
 
     
@@ -33,9 +92,9 @@ class AutomationPubSub:
         
         for topic in topics:
             if topic not in self.topics:
-                self.topics.append(topic)
+                self.topics.add(topic)
             else:
-                logging.debug(f"Topic '{topic}' is already subscribed.")
+                logging.debug("Topic '%s' is already subscribed.", topic)
 
     def connect(self):
         retries = 0
@@ -56,32 +115,32 @@ class AutomationPubSub:
 
 
     def __on_message(self, client, userdata, message):
-        received = str(message.payload.decode("utf-8"))
-
         try:
-            payload = json.loads(str(message.payload.decode("utf-8")))
-        except JSONDecodeError as e:
-            logging.debug(f'payload is not JSON: \n{received}\n Error:{e}')
-            payload = received
+            payload = json_loads(message.payload)
+        except ValueError as e:
+            # Covers JSONDecodeError from both parsers and invalid UTF-8
+            payload = message.payload.decode("utf-8", "replace")
+            logging.debug('payload is not JSON: \n%s\n Error:%s', payload, e)
             
-        logging.debug(f'New message payload from {message.topic}:\n{payload}')
+        logging.debug('New message payload from %s:\n%s', message.topic, payload)
 
 
         self.handle_message(message.topic, payload)
 
-    def on_message(self,client, userdata, message):
-        assert("Not Implemented")
-
+    @abstractmethod
     def handle_message(self, topic, payload):
-        assert("Not Implemented")
+        """
+        Called for every received message with the topic and the parsed payload
+        """
 
     def on_connect(self,client, userdata, message, properties=None):
         logging.debug("on_connect fired")        
         if not self.topics:
             logging.warning("No topics to subscribe to on connect.")
-        for topic in self.topics:
-            logging.debug(f'Subscribing to: {topic}')
-            client.subscribe(topic, qos=1)
+            return
+        logging.debug('Subscribing to: %s', self.topics)
+        # A single SUBSCRIBE packet carries every filter, one round trip on (re)connect
+        client.subscribe([(topic, 1) for topic in self.topics])
 
     def on_disconnect(self,client, userdata, message):
         
@@ -92,7 +151,7 @@ class AutomationPubSub:
         logging.debug(f'Reading config file from {file_path}')
         try:
             with open(file_path, 'r') as file:
-                data = yaml.safe_load(file)
+                data = yaml.load(file, Loader=SafeLoader)
                 return data
         except FileNotFoundError:
             logging.error(f"File {file_path} not found.")
@@ -1,8 +1,12 @@
 import os
+import json
+import time
+import atexit
+import asyncio
 import instaloader
 import argparse
-import time
 import logging
+from functools import lru_cache
 from influxdb_client import InfluxDBClient, Point
 from influxdb_client.client.write_api import SYNCHRONOUS
 from influxdb_client.rest import ApiException
@@ -15,34 +19,45 @@ load_dotenv()
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Without --heartbeat, an unchanged sample is written again every this many fetch intervals
+HEARTBEAT_INTERVALS = 6
+
+# Create the InfluxDB client once and reuse its connection for every sample
+@lru_cache(maxsize=1)
+def get_write_api(influx_host, influx_port):
+    # Retrieve the token from environment variables
+    influx_token = os.getenv("INFLUXDB_TOKEN")
+    influx_org = os.getenv("INFLUXDB_ORG")
+    
+    if not influx_token or not influx_org:
+        raise ValueError("InfluxDB token or organization not set in the .env file")
+
+    # Connect to InfluxDB using the token (InfluxDB 2.x client)
+    client = InfluxDBClient(url=f"http://{influx_host}:{influx_port}", token=influx_token, org=influx_org,
+                            enable_gzip=True)
+    atexit.register(client.close)
+
+    return client.write_api(write_options=SYNCHRONOUS)
+
 # Function to log data into InfluxDB
 def log_to_influxdb(username, followers, followees, posts, influx_host, influx_port, influx_db):
-    client = None  # Initialize client variable
     try:
-        # Retrieve the token from environment variables
-        influx_token = os.getenv("INFLUXDB_TOKEN")
-        influx_org = os.getenv("INFLUXDB_ORG")
-        
-        if not influx_token or not influx_org:
-            raise ValueError("InfluxDB token or organization not set in the .env file")
-
-        # Connect to InfluxDB using the token (InfluxDB 2.x client)
-        client = InfluxDBClient(url=f"http://{influx_host}:{influx_port}", token=influx_token, org=influx_org)
-
         # Prepare the data to be written to InfluxDB
-        write_api = client.write_api(write_options=SYNCHRONOUS)
+        write_api = get_write_api(influx_host, influx_port)
         point = Point("instagram_profile") \
             .tag("username", username) \
             .field("followers", followers) \
             .field("followees", followees) \
             .field("posts", posts)
 
-        # Write the data to the specified bucket
-        write_api.write(bucket=influx_db, org=influx_org, record=point)
+        # Write the data to the specified bucket (organization defaults to the client's)
+        write_api.write(bucket=influx_db, record=point)
         logging.info(f"Logged data for {username}: {followers} followers, {followees} followees, {posts} posts.")
+        return True
     
     except ApiException as api_error:
         logging.error(f"InfluxDB API error: {api_error}")
+        return False
     
     except ValueError as ve:
         logging.error(f"Configuration error: {ve}")
@@ -51,28 +66,57 @@ def log_to_influxdb(username, followers, followees, posts, influx_host, influx_p
     except Exception as general_error:
         logging.error(f"An unexpected error occurred during InfluxDB operation: {general_error}")
         exit()
-    
-    finally:
-        if client is not None:
-            client.close()
 
-# Main function to fetch profile data and log it
-def fetch_and_log_instagram_data(account_name, interval, influx_host, influx_port, influx_db):
+# Load the last written sample so restarts keep skipping unchanged data
+def load_last_sample(state_file):
+    try:
+        with open(state_file, 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+# Persist the last written sample
+def save_last_sample(state_file, sample):
+    try:
+        with open(state_file, 'w') as file:
+            json.dump(sample, file)
+    except OSError as os_error:
+        logging.warning(f"Could not save last sample to {state_file}: {os_error}")
+
+# A sample is only written again if it changed or the last write is older than the heartbeat
+def is_unchanged(last_sample, sample, now, heartbeat):
+    if last_sample is None or now - last_sample.get("ts", 0) >= heartbeat:
+        return False
+    return all(last_sample.get(key) == value for key, value in sample.items())
+
+# Main coroutine to fetch profile data and log it
+async def fetch_and_log_instagram_data(account_name, interval, influx_host, influx_port, influx_db,
+                                       heartbeat, state_file):
     # Creating an instance of Instaloader
     bot = instaloader.Instaloader()
+    last_sample = load_last_sample(state_file)
     
     while True:
         try:
-            # Load the Instagram profile
-            profile = instaloader.Profile.from_username(bot.context, account_name)
+            # Load the Instagram profile; instaloader blocks on HTTP, so run it in a worker thread
+            profile = await asyncio.to_thread(instaloader.Profile.from_username, bot.context, account_name)
             
             # Extract the required information
-            followers = profile.followers
-            followees = profile.followees
-            posts = profile.mediacount
-            
+            sample = {
+                "username": profile.username,
+                "followers": profile.followers,
+                "followees": profile.followees,
+                "posts": profile.mediacount,
+            }
+            now = time.time()
+
+            if is_unchanged(last_sample, sample, now, heartbeat):
+                logging.info(f"No changes for {profile.username} since the last sample, skipping write.")
             # Log the data to InfluxDB
-            log_to_influxdb(profile.username, followers, followees, posts, influx_host, influx_port, influx_db)
+            elif log_to_influxdb(sample["username"], sample["followers"], sample["followees"], sample["posts"],
+                                 influx_host, influx_port, influx_db):
+                last_sample = {**sample, "ts": now}
+                save_last_sample(state_file, last_sample)
         
         except ProfileNotExistsException as profile_error:
             logging.error(f"Profile does not exist: {profile_error}")
@@ -85,7 +129,7 @@ def fetch_and_log_instagram_data(account_name, interval, influx_host, influx_por
             logging.error(f"An unexpected error occurred during data fetching: {general_error}")
         
         # Wait for the specified interval before making the next request
-        time.sleep(interval)
+        await asyncio.sleep(interval)
 
 # Argument parser for command-line arguments
 def parse_arguments():
@@ -99,6 +143,11 @@ def parse_arguments():
     parser.add_argument("--influx-host", type=str, default="ubuntuserver", help="InfluxDB host (default: localhost)")
     parser.add_argument("--influx-port", type=int, default=8086, help="InfluxDB port (default: 8086)")
     parser.add_argument("--influx-db", type=str, default="instagram_metrics", help="InfluxDB bucket name (default: instagram_metrics)")
+
+    # Arguments for skipping unchanged samples
+    parser.add_argument("--heartbeat", type=int, default=None,
+                        help=f"Seconds after which an unchanged sample is written again (default: {HEARTBEAT_INTERVALS} intervals)")
+    parser.add_argument("--state-file", type=str, default="last_sample.json", help="File keeping the last written sample (default: last_sample.json)")
     
     return parser.parse_args()
 
@@ -107,10 +156,12 @@ if __name__ == "__main__":
     args = parse_arguments()
 
     # Start fetching and logging Instagram data
-    fetch_and_log_instagram_data(
+    asyncio.run(fetch_and_log_instagram_data(
         account_name=args.account_name,
         interval=args.interval,
         influx_host=args.influx_host,
         influx_port=args.influx_port,
-        influx_db=args.influx_db
-    )
\ No newline at end of file
+        influx_db=args.influx_db,
+        heartbeat=args.heartbeat if args.heartbeat is not None else HEARTBEAT_INTERVALS * args.interval,
+        state_file=args.state_file
+    ))
\ No newline at end of file
@@ -1,5 +1,6 @@
-import time,json, logging, threading
-import paho.mqtt.client as paho
+import logging
+import signal
+import sys
 from enum import Enum
 
 from homehub_mqtt import AutomationPubSub
@@ -26,14 +27,35 @@ class KitchenLightAutomation(AutomationPubSub):
     KITCHEN_ISLAND_LIGHTS = "Island Lights Kitchen Switch"
 
     
-    TOPICS = [f'{ROOT_TOPIC}/{LIVING_ROOM_LIGHT_SWITCH}',
-              f'{ROOT_TOPIC}/{STORAGE_SWITCH}',
-              f'{ROOT_TOPIC}/{KITCHEN_ISLAND_LIGHTS}']
+    LIVING_ROOM_LIGHT_SWITCH_TOPIC = f'{ROOT_TOPIC}/{LIVING_ROOM_LIGHT_SWITCH}'
+    STORAGE_SWITCH_TOPIC = f'{ROOT_TOPIC}/{STORAGE_SWITCH}'
+    STORAGE_SWITCH_GET_TOPIC = f'{STORAGE_SWITCH_TOPIC}/get'
+    STORAGE_SWITCH_SET_TOPIC = f'{STORAGE_SWITCH_TOPIC}/set'
+    KITCHEN_ISLAND_LIGHTS_TOPIC = f'{ROOT_TOPIC}/{KITCHEN_ISLAND_LIGHTS}'
+    KITCHEN_ISLAND_LIGHTS_GET_TOPIC = f'{KITCHEN_ISLAND_LIGHTS_TOPIC}/get'
+    KITCHEN_ISLAND_LIGHTS_SET_TOPIC = f'{KITCHEN_ISLAND_LIGHTS_TOPIC}/set'
+
+    TOPICS = [LIVING_ROOM_LIGHT_SWITCH_TOPIC,
+              STORAGE_SWITCH_TOPIC,
+              KITCHEN_ISLAND_LIGHTS_TOPIC]
+
+    # Pre-encoded commands, published as-is
+    GET_ISLAND_LIGHTS = b'{"state": ""}'
+    GET_SPOTLIGHTS = b'{"state_left": ""}'
+    SET_ISLAND_LIGHTS_ON = b'{"state":"ON"}'
+    SET_SPOTLIGHTS_ON = b'{"state_left":"ON"}'
+    SET_SPOTLIGHTS_OFF = b'{"state_left":"OFF"}'
 
     def __init__(self, broker_ip:str, name:str):
         super().__init__(broker_ip,name)
         self.__spotlight_status = State.UNKNOWN
         self.__islandlight_status = State.UNKNOWN
+
+        self._handlers = {
+            self.KITCHEN_ISLAND_LIGHTS_TOPIC: self._on_island,
+            self.STORAGE_SWITCH_TOPIC: self._on_storage,
+            self.LIVING_ROOM_LIGHT_SWITCH_TOPIC: self._on_wall,
+        }
         
         self._subscribe_to_topics(self.TOPICS)        
     
@@ -48,55 +70,58 @@ class KitchenLightAutomation(AutomationPubSub):
         
         """
                 
-        logging.debug(f'Current state-> spot:{self.spotlight_status} island:{self.islandlight_status}')
-
-        
-        if topic == f'{self.ROOT_TOPIC}/{self.KITCHEN_ISLAND_LIGHTS}':            
-            self.islandlight_status = payload["state"]
-
-        if topic == f'{self.ROOT_TOPIC}/{self.STORAGE_SWITCH}':            
-            self.spotlight_status = payload["state_left"]
+        logging.debug('Current state-> spot:%s island:%s', self.spotlight_status, self.islandlight_status)
 
         try:
-            if topic == f'{self.ROOT_TOPIC}/{self.LIVING_ROOM_LIGHT_SWITCH}' and \
-                payload["action"] == "single_right":
-                
-                if self.spotlight_status:
-                    if self.islandlight_status:
-                        self.set_kitchen_lights("off")
-                    else:
-                        self.set_island_light("on")
-                else:
-                    self.set_kitchen_lights("on")
+            self._handlers.get(topic, self._ignore)(payload)
         except KeyError as e:
             logging.error(f'Error: {e}. \n\nPayload: {payload}\n\n')
 
+    def _ignore(self, payload):
+        pass
+
+    def _on_island(self, payload):
+        self.islandlight_status = payload["state"]
+
+    def _on_storage(self, payload):
+        self.spotlight_status = payload["state_left"]
+
+    def _on_wall(self, payload):
+        if payload["action"] == "single_right":
+            if self.spotlight_status:
+                if self.islandlight_status:
+                    self.set_kitchen_lights("off")
+                else:
+                    self.set_island_light("on")
+            else:
+                self.set_kitchen_lights("on")
+
 
     def get_lights_status(self):
-        command = '{"state": ""}'
-        logging.debug(f'sending: {command} to {self.ROOT_TOPIC}/{self.KITCHEN_ISLAND_LIGHTS}/get')
-        self.client.publish(f'{self.ROOT_TOPIC}/{self.KITCHEN_ISLAND_LIGHTS}/get',command)
+        command = self.GET_ISLAND_LIGHTS
+        logging.debug('sending: %s to %s', command, self.KITCHEN_ISLAND_LIGHTS_GET_TOPIC)
+        self.client.publish(self.KITCHEN_ISLAND_LIGHTS_GET_TOPIC,command)
 
-        command = '{"state_left": ""}'
-        logging.debug(f'sending: {command}')
-        self.client.publish(f'{self.ROOT_TOPIC}/{self.STORAGE_SWITCH}/get',command)
+        command = self.GET_SPOTLIGHTS
+        logging.debug('sending: %s', command)
+        self.client.publish(self.STORAGE_SWITCH_GET_TOPIC,command)
 
     def set_kitchen_lights(self, status):
         if status.lower() == "on":
-            command = '{"state_left":"ON"}'
-            logging.debug(f'sending: {command} to {self.ROOT_TOPIC}/{self.STORAGE_SWITCH}/set')
-            self.client.publish(f'{self.ROOT_TOPIC}/{self.STORAGE_SWITCH}/set',command)
+            command = self.SET_SPOTLIGHTS_ON
+            logging.debug('sending: %s to %s', command, self.STORAGE_SWITCH_SET_TOPIC)
+            self.client.publish(self.STORAGE_SWITCH_SET_TOPIC,command)
         else:
-            command = '{"state_left":"OFF"}'
-            logging.debug(f'sending: {command} to {self.ROOT_TOPIC}/{self.STORAGE_SWITCH}/set')
-            self.client.publish(f'{self.ROOT_TOPIC}/{self.STORAGE_SWITCH}/set',command)
+            command = self.SET_SPOTLIGHTS_OFF
+            logging.debug('sending: %s to %s', command, self.STORAGE_SWITCH_SET_TOPIC)
+            self.client.publish(self.STORAGE_SWITCH_SET_TOPIC,command)
             self.islandlight_status = "off"
 
     def set_island_light(self, status="ON"):
-        print("Setting Kitchen Island")
-        command = '{"state":"ON"}'
-        logging.debug(f'sending: {command} to {self.ROOT_TOPIC}/{self.KITCHEN_ISLAND_LIGHTS}/set')
-        self.client.publish(f'{self.ROOT_TOPIC}/{self.KITCHEN_ISLAND_LIGHTS}/set',command)
+        logging.info("Setting Kitchen Island")
+        command = self.SET_ISLAND_LIGHTS_ON
+        logging.debug('sending: %s to %s', command, self.KITCHEN_ISLAND_LIGHTS_SET_TOPIC)
+        self.client.publish(self.KITCHEN_ISLAND_LIGHTS_SET_TOPIC,command)
  
     @property
     def spotlight_status(self):
@@ -104,7 +129,7 @@ class KitchenLightAutomation(AutomationPubSub):
 
     @spotlight_status.setter
     def spotlight_status(self,status):
-        logging.debug(f'Setter spot light:{status}')
+        logging.debug('Setter spot light:%s', status)
         if status.lower() == "on":
             self.__spotlight_status = State.ON
         elif status.lower() == "off":
@@ -116,7 +141,7 @@ class KitchenLightAutomation(AutomationPubSub):
 
     @islandlight_status.setter
     def islandlight_status(self,status):
-        logging.debug(f'Setter insland light:{status}')
+        logging.debug('Setter insland light:%s', status)
         if status.lower() == "on":
             self.__islandlight_status = True
         elif status.lower() == "off":
@@ -124,6 +149,11 @@ class KitchenLightAutomation(AutomationPubSub):
 
         
 
+# Signal handler for graceful shutdown of the script
+def signal_handler(sig, frame):
+    logging.info('Gracefully shutting down...')
+    sys.exit(0)
+
 broker = "192.168.1.60"
 name = "automation.kitchen_lights"
 
@@ -131,7 +161,9 @@ kitchen_lights = KitchenLightAutomation(broker_ip = broker, name = name)
 kitchen_lights.connect()
 kitchen_lights.get_lights_status()
 
+signal.signal(signal.SIGINT, signal_handler)
+signal.signal(signal.SIGTERM, signal_handler)
 
-while True:
-    time.sleep(2)
+# Sleep until a signal arrives; paho's network thread handles the messages
+signal.pause()
 
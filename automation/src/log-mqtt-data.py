@@ -1,7 +1,13 @@
-import time,json, logging
+import os, time, logging, atexit, signal, queue, threading
 import paho.mqtt.client as paho
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client import InfluxDBClient, WriteOptions
+from urllib3 import Retry
+
+try:
+    # orjson parses the raw payload bytes directly and is considerably faster
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 logging.basicConfig(
         level=logging.DEBUG,
@@ -16,28 +22,102 @@ broker = "192.168.1.60"
 
 
 
-client = InfluxDBClient(url="http://ubuntuserver:8086", token="Aqueduct6-Schematic-Morse", org="homehub")
+influx_url = os.getenv("INFLUXDB_URL", "http://ubuntuserver:8086")
+influx_token = os.getenv("INFLUXDB_TOKEN")
+influx_org = os.getenv("INFLUXDB_ORG", "homehub")
+
+if not influx_token:
+    raise SystemExit("INFLUXDB_TOKEN is not set")
+
+# Keep-alive connections are pooled by urllib3, so bursts of writes reuse sockets
+influx_client = InfluxDBClient(url=influx_url, token=influx_token, org=influx_org,
+                               enable_gzip=True,
+                               connection_pool_maxsize=16,
+                               retries=Retry(total=3, backoff_factor=0.1))
+
+def on_write_retry(conf, data, exception):
+    logging.warning(f"Retrying a batch write to {conf[0]}: {exception}")
+
+def on_write_error(conf, data, exception):
+    # The batch has been given up on; its points are lost
+    logging.error(f"Failed to write a batch to {conf[0]}: {exception}")
+
+# Points are buffered and sent in batches by the client's background writer, so write()
+# only enqueues and failures are reported through the callbacks
+write_api = influx_client.write_api(write_options=WriteOptions(batch_size=500,
+                                                               flush_interval=1_000,
+                                                               jitter_interval=200,
+                                                               retry_interval=5_000),
+                                    error_callback=on_write_error,
+                                    retry_callback=on_write_retry)
+query_api = influx_client.query_api()
+
+# atexit runs in reverse order: flush the pending batch, then close the client
+atexit.register(influx_client.close)
+atexit.register(write_api.close)
+
 
-write_api = client.write_api(write_options=SYNCHRONOUS)
-query_api = client.query_api()
+# Field keys escape commas, equals signs and spaces (and the escape character itself)
+FIELD_KEY_ESCAPES = str.maketrans({'\\': '\\\\', ',': '\\,', '=': '\\=', ' ': '\\ '})
 
+def to_line_protocol(field, value, timestamp_ns):
+    """
+    Builds a 'ventilation' line protocol record, formatting the value the way Point.field does
+    """
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    elif isinstance(value, int):
+        value = f'{value}i'
+    elif isinstance(value, float):
+        value = repr(value)
+    elif isinstance(value, str):
+        value = '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    else:
+        raise ValueError(f'Unsupported field type {type(value).__name__}')
+    return f'ventilation {field.translate(FIELD_KEY_ESCAPES)}={value} {timestamp_ns}'
+
+
+MAX_BATCH = 500
+
+# Raw messages handed over from paho's network thread to the writer thread
+samples = queue.Queue()
 
 #define callback
 def on_message(client, userdata, message):
-    global write_api
-    received = str(message.payload.decode("utf-8"))
-    
-    try:
-        itho_info = json.loads(message.payload.decode("utf-8"))
-        p = Point("ventilation").field(message.topic, itho_info)
-        write_api.write(bucket=bucket, record=p)
-        
-        logging.debug(message.topic)
-        logging.debug(itho_info)        
-
-        
-    except Exception as e:
-        return 
+    # Keep the network thread free: timestamp and enqueue, parse later
+    samples.put((message.topic, message.payload, time.time_ns()))
+
+def write_samples():
+    """
+    Parses queued messages and writes whatever is pending in a single call, until a None arrives
+    """
+    running = True
+    while running:
+        pending = [samples.get()]
+        while len(pending) < MAX_BATCH:
+            try:
+                pending.append(samples.get_nowait())
+            except queue.Empty:
+                break
+
+        records = []
+        for sample in pending:
+            if sample is None:
+                running = False
+                break
+            topic, payload, timestamp_ns = sample
+            try:
+                itho_info = json_loads(payload)
+                records.append(to_line_protocol(topic, itho_info, timestamp_ns))
+
+                logging.debug(topic)
+                logging.debug(itho_info)
+            except Exception as e:
+                # e.g. JSON objects or lists, which have no single field value
+                logging.debug('Skipping %s: %s', topic, e)
+
+        if records:
+            write_api.write(bucket=bucket, record=records)
 
 bucket = "homehub"
 
@@ -50,7 +130,6 @@ client.on_message=on_message
 #####
 logging.info(f"connecting to broker {broker}")
 client.connect(broker)#connect
-client.loop_start() #start loop to process received messages
 
 # client.publish("itho/cmd",'20')
 # time.sleep(4)
@@ -58,7 +137,18 @@ client.loop_start() #start loop to process received messages
 logging.info("subscribing ")
 client.subscribe("itho/#")#subscribe
 # client.subscribe("zigbee2mqtt/#")#subscribe
-while True:
-    time.sleep(2)
+
+# Disconnecting ends loop_forever, so the exit handlers flush pending points
+signal.signal(signal.SIGINT, lambda sig, frame: client.disconnect())
+signal.signal(signal.SIGTERM, lambda sig, frame: client.disconnect())
+
+writer = threading.Thread(target=write_samples, daemon=True)
+writer.start()
+
+client.loop_forever() #process received messages until disconnected
+
+# Let the writer drain the queue before the exit handlers flush the batch
+samples.put(None)
+writer.join()
     
     
@@ -1,7 +1,8 @@
-import time,json, logging, threading
-import paho.mqtt.client as paho
+import logging
+import signal
+import sys
 
-from homehub_mqtt import AutomationPubSub
+from homehub_mqtt import AutomationPubSub, RearmableTimer
 
 logging.basicConfig(
         level=logging.DEBUG,
@@ -16,11 +17,19 @@ class StorageLightAutomation(AutomationPubSub):
     ROOT_TOPIC = "zigbee2mqtt"
     STORAGE_WALL_SWITCH = "Storage Switch"
     STORAGE_WINDOW_SENSOR = "Door Storage Switch"    
-    TOPICS = [f'{ROOT_TOPIC}/{STORAGE_WINDOW_SENSOR}']
 
-    def __init__(self, broker_ip:str, name:str):
+    # Pre-encoded commands, published as-is
+    LIGHT_ON = b'{"state_right":"ON"}'
+    LIGHT_OFF = b'{"state_right":"OFF"}'
+
+    def __init__(self, broker_ip:str, name:str,
+                 wall_switch:str = STORAGE_WALL_SWITCH,
+                 window_sensor:str = STORAGE_WINDOW_SENSOR):
         super().__init__(broker_ip,name)        
-        self._subscribe_to_topics(self.TOPICS)        
+        self.window_sensor_topic = f'{self.ROOT_TOPIC}/{window_sensor}'
+        self.wall_switch_set_topic = f'{self.ROOT_TOPIC}/{wall_switch}/set'
+        self.timer = RearmableTimer(self.set_light)
+        self._subscribe_to_topics([self.window_sensor_topic])        
     
 
     def handle_message(self, topic, payload):
@@ -36,27 +45,25 @@ class StorageLightAutomation(AutomationPubSub):
 
         
         """
-        if topic == f'{self.ROOT_TOPIC}/{self.STORAGE_WINDOW_SENSOR}':
+        if topic == self.window_sensor_topic:
             storage_sensor = payload
             try:
                 if storage_sensor["contact"]:
+                    # Door closed: the pending auto-off would only repeat this
+                    self.timer.cancel()
                     self.set_light(status = False)
                 else: 
                     self.set_light(status = True)
-                    self.timer = threading.Timer(self.TIMEOUT, self.set_light)
-                    self.timer.start()
+                    self.timer.start(self.TIMEOUT)
             except KeyError as e:
                 logging.error(f'Error:{e}')
         else:
             logging.debug(f'Skipping: {topic}')
 
     def set_light(self,status = False):
-        if status:
-            command = '{"state_right":"ON"}'
-        else:
-            command = '{"state_right":"OFF"}'
-        logging.debug(f'sending: {command} to {self.ROOT_TOPIC}/{self.STORAGE_WALL_SWITCH}/set')
-        self.client.publish(f'{self.ROOT_TOPIC}/{self.STORAGE_WALL_SWITCH}/set',command)
+        command = self.LIGHT_ON if status else self.LIGHT_OFF
+        logging.debug('sending: %s to %s', command, self.wall_switch_set_topic)
+        self.client.publish(self.wall_switch_set_topic,command)
         
 
 
@@ -64,13 +71,24 @@ class StorageLightAutomation(AutomationPubSub):
 
         
 
-broker = "192.168.1.60"
-name = "automation.strorage_light"
+# Signal handler for graceful shutdown of the script
+def signal_handler(sig, frame):
+    logging.info('Gracefully shutting down...')
+    sys.exit(0)
+
+def main():
+    broker = "192.168.1.60"
+    name = "automation.strorage_light"
+
+    storage_automation = StorageLightAutomation(broker_ip = broker, name = name)
+    storage_automation.connect()
 
-storage_automation = StorageLightAutomation(broker_ip = broker, name = name)
-storage_automation.connect()
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
 
+    # Sleep until a signal arrives; paho's network thread handles the messages
+    signal.pause()
 
-while True:
-    time.sleep(2)
 
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,10 @@ To control this switch publish a message to topic zigbee2mqtt/FRIENDLY_NAME/set
 
 """
 
-import time,json, logging, threading
-import paho.mqtt.client as paho
+import time, logging
 from enum import Enum
-from icecream import ic
-import time
 
-from .homehub_mqtt import AutomationPubSub
+from .homehub_mqtt import AutomationPubSub, RearmableTimer
 
 
 
@@ -60,7 +57,13 @@ class TowelHeaterAutomation(AutomationPubSub):
     TIME_THRESHOLD_BETWEEN_MESSAGES = 0.01 # seconds
     ROOT_TOPIC = "zigbee2mqtt"
     TOWEL_HEATER = "Bathroom Socket"
-    TOPICS = [f'{ROOT_TOPIC}/{TOWEL_HEATER}']
+    TOWEL_HEATER_TOPIC = f'{ROOT_TOPIC}/{TOWEL_HEATER}'
+    TOWEL_HEATER_SET_TOPIC = f'{TOWEL_HEATER_TOPIC}/set'
+    TOPICS = [TOWEL_HEATER_TOPIC]
+
+    # Pre-encoded commands, published as-is
+    HEATER_ON = b'{"state":"ON"}'
+    HEATER_OFF = b'{"state":"OFF"}'
 
     class TowelStateMachine(Enum):
         IDLE = 0
@@ -68,6 +71,22 @@ class TowelHeaterAutomation(AutomationPubSub):
         HEALTH_INDICATION_OFF_SLEEP = 2
         HEATING = 3
 
+    # (current state, reported socket state) -> (next state, action run on the transition)
+    # Any other combination leaves the state machine untouched.
+    TRANSITIONS = {
+        (TowelStateMachine.IDLE, "ON"):
+            (TowelStateMachine.HEALTH_INDICATION_ON_SLEEP,
+             lambda self: self.delayed_towel_heater(False, self.SHORT_CYCLE_TIME)),
+        (TowelStateMachine.HEALTH_INDICATION_ON_SLEEP, "OFF"):
+            (TowelStateMachine.HEALTH_INDICATION_OFF_SLEEP,
+             lambda self: self.delayed_towel_heater(True, self.SHORT_CYCLE_TIME)),
+        (TowelStateMachine.HEALTH_INDICATION_OFF_SLEEP, "ON"):
+            (TowelStateMachine.HEATING,
+             lambda self: self.delayed_towel_heater(False, self.LONG_CYCLE_TIME)),
+        (TowelStateMachine.HEATING, "OFF"):
+            (TowelStateMachine.IDLE,
+             lambda self: self.cancel_towel_heater_timer()),
+    }
 
     def __init__(self, broker_ip:str, name:str):
         """Initialize the TowelHeaterAutomation class with MQTT broker details and subscribe to topics."""
@@ -75,9 +94,9 @@ class TowelHeaterAutomation(AutomationPubSub):
         self._subscribe_to_topics(self.TOPICS) 
         self._health_indication_state = False # Flag to indicate if we are in the middle of a sequence     
         self._heater_active = False
-        self._timer = None
+        self._timer = RearmableTimer(self.set_towel_heater)
         self._state = self.TowelStateMachine.IDLE
-        self._time_at_last_message = 0
+        self._time_at_last_message = 0.0
         
     
 
@@ -98,14 +117,13 @@ class TowelHeaterAutomation(AutomationPubSub):
 
         
         """        
-        if topic == f'{self.ROOT_TOPIC}/{self.TOWEL_HEATER}':
+        if topic == self.TOWEL_HEATER_TOPIC:
             try:
-                current_time = time.time()
-                ic(f'Received message: {topic} {payload} at {time.time()}')
-                logging.debug(payload)
+                current_time = time.monotonic()
+                logging.debug('Received message: %s %s at %s', topic, payload, current_time)
 
                 if current_time - self._time_at_last_message < self.TIME_THRESHOLD_BETWEEN_MESSAGES:
-                    ic(f'Ignoring message: {topic} {payload} at {time.time()}')
+                    logging.debug('Ignoring message: %s %s at %s', topic, payload, current_time)
                     self._time_at_last_message = current_time
                     return
                 
@@ -114,8 +132,6 @@ class TowelHeaterAutomation(AutomationPubSub):
 
             except KeyError as e:
                 logging.error(f'Error: {e}')
-            except json.JSONDecodeError as e:
-                logging.error(f'JSON Decode Error: {e}')
         else:
             logging.debug(f'Skipping: {topic}')
 
@@ -129,64 +145,39 @@ class TowelHeaterAutomation(AutomationPubSub):
         Args:
             payload (dict): The payload received from the MQTT message.
         """
-        towel_heater = payload
         logging.debug(f'state: {self._state}')
-        if self._state == self.TowelStateMachine.IDLE:
-            
-            if towel_heater["state"] == "ON":
-                self._state = self.TowelStateMachine.HEALTH_INDICATION_ON_SLEEP                        
-                self.delayed_towel_heater(False, self.SHORT_CYCLE_TIME)
-                logging.debug(f'new state: {self._state}')
-                
-            return
-        
-        if self._state == self.TowelStateMachine.HEALTH_INDICATION_ON_SLEEP:
-            if towel_heater["state"] == "OFF":
-                self._state = self.TowelStateMachine.HEALTH_INDICATION_OFF_SLEEP
-                logging.debug(f'new state: {self._state}')
-                self.delayed_towel_heater(True, self.SHORT_CYCLE_TIME)                        
+        transition = self.TRANSITIONS.get((self._state, payload["state"]))
+        if transition is None:
             return
-        
-        if self._state == self.TowelStateMachine.HEALTH_INDICATION_OFF_SLEEP:
-            if towel_heater["state"] == "ON":
-                self._state = self.TowelStateMachine.HEATING
-                logging.debug(f'new state: {self._state}')
-                self.delayed_towel_heater(False, self.LONG_CYCLE_TIME)
-                
-            return
-        
-        if self._state == self.TowelStateMachine.HEATING:
-            if towel_heater["state"] == "OFF":
-                self._state = self.TowelStateMachine.IDLE
-                logging.debug(f'new state: {self._state}')
-                if self._timer:
-                    self._timer.cancel()
 
-                
-            return
+        self._state, action = transition
+        logging.debug(f'new state: {self._state}')
+        action(self)
 
     def set_towel_heater(self, status=False):
-        command = '{"state":"ON"}' if status else '{"state":"OFF"}'
-        logging.debug(f'sending: {command} to {self.ROOT_TOPIC}/{self.TOWEL_HEATER}/set')
-        self.client.publish(f'{self.ROOT_TOPIC}/{self.TOWEL_HEATER}/set', command)
+        command = self.HEATER_ON if status else self.HEATER_OFF
+        logging.debug('sending: %s to %s', command, self.TOWEL_HEATER_SET_TOPIC)
+        self.client.publish(self.TOWEL_HEATER_SET_TOPIC, command)
         
 
 
+    def cancel_towel_heater_timer(self):
+        """Cancel the pending delayed state change, if any."""
+        self._timer.cancel()
+
     def delayed_towel_heater(self, status, duration):
         """
         Set the state of the towel heater after a delay.
 
         This method uses a timer to delay setting the state of the heater. It's useful
-        for implementing the cycles of the heater's operation.
+        for implementing the cycles of the heater's operation. Calling it again replaces
+        any pending change; a single worker thread serves every cycle.
 
         Args:
             status (bool): The desired state of the heater after the delay.
             duration (float): The duration of the delay in seconds.
         """
-        if self._timer:
-            self._timer.cancel()  # Cancel any existing timer
-        self._timer = threading.Timer(duration, self.set_towel_heater, args=(status, ))
-        self._timer.start()
+        self._timer.start(duration, args=(status, ))
 
 
 
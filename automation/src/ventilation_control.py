@@ -1,4 +1,4 @@
-import time, json, logging
+import logging
 import paho.mqtt.client as paho
 import signal
 import sys
@@ -14,13 +14,19 @@ logging.basicConfig(
         logging.StreamHandler()
     ]
 )
+logger = logging.getLogger(__name__)
+
+def itho_command(power_percentage: int) -> bytes:
+    # Scale 0-100 to the itho's 0-255 range in integer arithmetic
+    return str(power_percentage * 255 // 100).encode()
 
 class VentilationAutomation(AutomationPubSub):
     # Constants used for MQTT topics and timeout
     TIMEOUT = 180
     ROOT_TOPIC = "zigbee2mqtt"
     BATHROOM_TEMPERATURE_SENSOR = "Bathroom Sensor"
-    TOPICS = [f'{ROOT_TOPIC}/{BATHROOM_TEMPERATURE_SENSOR}']
+    BATHROOM_TEMPERATURE_SENSOR_TOPIC = f'{ROOT_TOPIC}/{BATHROOM_TEMPERATURE_SENSOR}'
+    TOPICS = [BATHROOM_TEMPERATURE_SENSOR_TOPIC]
 
     # Humidity thresholds and corresponding ventilation levels
     HUMIDITY_HIGH_THRESHOLD = 85
@@ -30,11 +36,21 @@ class VentilationAutomation(AutomationPubSub):
     VENTILATION_MEDIUM = 70
     VENTILATION_LOW = 50
     VENTILATION_MIN = 8
+    # Checked in order; below the last threshold the ventilation runs at VENTILATION_MIN
+    HUMIDITY_LEVELS = ((HUMIDITY_HIGH_THRESHOLD, VENTILATION_HIGH),
+                       (HUMIDITY_MEDIUM_THRESHOLD, VENTILATION_MEDIUM),
+                       (HUMIDITY_LOW_THRESHOLD, VENTILATION_LOW))
+
+    # itho/cmd payloads for the fixed levels, computed once
+    ITHO_COMMANDS = {level: itho_command(level)
+                     for level in (VENTILATION_HIGH, VENTILATION_MEDIUM, VENTILATION_LOW, VENTILATION_MIN)}
 
     def __init__(self, broker_ip: str, name: str):
         # Initialize the parent class with broker IP and name, and subscribe to topics
         super().__init__(broker_ip, name)
         self._subscribe_to_topics(self.TOPICS)
+        # Last level sent, so steady humidity readings don't republish the same command
+        self._last_power = None
 
     def handle_message(self, topic, payload):
         """ Handle incoming MQTT messages and control ventilation based on humidity
@@ -49,46 +65,56 @@ class VentilationAutomation(AutomationPubSub):
         }
         """
         # Check if the topic matches the expected bathroom sensor topic
-        if topic == f'{self.ROOT_TOPIC}/{self.BATHROOM_TEMPERATURE_SENSOR}':
+        if topic == self.BATHROOM_TEMPERATURE_SENSOR_TOPIC:
             try:
                 humidity = payload['humidity']
                 # Determine the ventilation level based on humidity
-                if humidity > self.HUMIDITY_HIGH_THRESHOLD:
-                    power_percentage = self.VENTILATION_HIGH
-                elif humidity > self.HUMIDITY_MEDIUM_THRESHOLD:
-                    power_percentage = self.VENTILATION_MEDIUM
-                elif humidity > self.HUMIDITY_LOW_THRESHOLD:
-                    power_percentage = self.VENTILATION_LOW
-                else:
-                    power_percentage = self.VENTILATION_MIN
-                self.set_ventilation(power_percentage)
+                power_percentage = self.VENTILATION_MIN
+                for threshold, level in self.HUMIDITY_LEVELS:
+                    if humidity > threshold:
+                        power_percentage = level
+                        break
+                # Only remember levels that reached the client, so a failed publish is retried
+                if power_percentage != self._last_power and self.set_ventilation(power_percentage):
+                    self._last_power = power_percentage
             except KeyError as e:
                 # Log an error if a required key is missing from the payload
-                logging.error(f'Key Error: {e}')
+                logger.error(f'Key Error: {e}')
                 return
             except TypeError as e:
                 # Log an error if the payload is of an unexpected type
-                logging.error(f'Type Error: {e}')
+                logger.error(f'Type Error: {e}')
                 return
         else:
             # Log a warning if the message is from an unexpected topic
-            logging.warning(f'Received message from unknown topic: {topic}')
+            logger.warning('Received message from unknown topic: %s', topic)
 
-    def set_ventilation(self, power_percentage: int):
+    def set_ventilation(self, power_percentage: int) -> bool:
+        """ Publish the ventilation level, returning whether the client accepted the command """
         # Ensure the power percentage is within valid range (0-100)
         if 0 <= power_percentage <= 100:
-            logging.info(f'Setting ventilation to {power_percentage}% - itho/cmd - {str(int(power_percentage * 2.55))}')
+            command = self.ITHO_COMMANDS.get(power_percentage)
+            if command is None:
+                command = itho_command(power_percentage)
+            logger.info('Setting ventilation to %s%% - itho/cmd - %s', power_percentage, command.decode())
             try:
                 # Publish the calculated value to the MQTT topic to control ventilation
-                self.client.publish("itho/cmd", str(int(power_percentage * 2.55)))
-            except paho.mqtt.client.MQTTException as e:
+                info = self.client.publish("itho/cmd", command)
+            except paho.MQTTException as e:
                 # Log an error if there's an issue publishing the message
-                logging.error(f'Failed to publish MQTT message: {e}')
+                logger.error(f'Failed to publish MQTT message: {e}')
+                return False
+            if info.rc != paho.MQTT_ERR_SUCCESS:
+                # e.g. MQTT_ERR_NO_CONN while the broker is unreachable; the message is dropped
+                logger.warning('Failed to publish ventilation command: %s', paho.error_string(info.rc))
+                return False
+            return True
+        return False
 
 
 # Signal handler for graceful shutdown of the script
 def signal_handler(sig, frame):
-    logging.info('Gracefully shutting down...')
+    logger.info('Gracefully shutting down...')
     sys.exit(0)
 
 # Function to get the broker IP from environment variables (default to a specific IP if not set)
@@ -1,5 +1,6 @@
 # tests/test_dishwasher_control.py
 import sys
+import copy
 import types
 from unittest.mock import MagicMock, patch
 import pytest
@@ -55,10 +56,16 @@ sys.modules['hassapi'] = mock_hassapi
 # Now we can safely import DishwasherControl
 from src.appdaemon.dishwasher_control import DishwasherControl
 
-@pytest.fixture
-def dishwasher_control(request):
+@pytest.fixture(scope="session")
+def initialized_dishwasher_control():
+    # initialize() loads the energy profile CSV; do it once and hand out copies
     control = DishwasherControl()
     control.initialize()
+    return control
+
+@pytest.fixture
+def dishwasher_control(request, initialized_dishwasher_control):
+    control = copy.copy(initialized_dishwasher_control)
 
     entity_states = request.param
 
@@ -38,24 +38,24 @@ test_data = [
 
 # 2023-12-19T01:00:00+00:00
 
-# Fixtures for Sample Data
-@pytest.fixture
+# Fixtures for Sample Data, parsed once per session (the analyzer never modifies them)
+@pytest.fixture(scope="session")
 def sample_appliance_profile():
     return load_csv(get_data_file_path(SAMPLE_CSV_DATA))
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_prices():
     return load_json_from_file(get_data_file_path(SAMPLE_JSON_DATA))
 
 # Test for Data Loading
 def test_load_csv(sample_appliance_profile):
     df = sample_appliance_profile
-    assert isinstance(df, pd.DataFrame)
+    assert type(df) is pd.DataFrame
     assert not df.empty
 
 def test_load_json_from_file(sample_prices):
     df = sample_prices
-    assert isinstance(df, pd.DataFrame)
+    assert type(df) is pd.DataFrame
     assert not df.empty
 
 # Test for Price Update
@@ -77,7 +77,20 @@ def test_find_cheapest_period(sample_appliance_profile, sample_prices):
     analyzer.update_prices(sample_prices)
     start_time, min_cost, max_cost = analyzer.find_cheapest_period()
     assert isinstance(start_time, datetime) or start_time is None
-    assert isinstance(min_cost, float) or min_cost is None
+    assert type(min_cost) is float or min_cost is None
+
+# A 60.5 minute profile against one hour of prices leaves no shift that fits
+@patch('src.energycalculation.datetime')
+def test_find_cheapest_period_profile_longer_than_prices(mock_datetime):
+    mock_datetime.now.return_value = MOCKED_CURRENT_TIME
+    profile = pd.DataFrame({"Time": pd.date_range("2023-12-19 00:00:00", periods=727, freq="5s"),
+                            "Power": 100})
+    prices = pd.DataFrame({"start_time": pd.to_datetime(["2023-12-19T02:00:00+00:00",
+                                                         "2023-12-19T03:00:00+00:00"], utc=True),
+                           "price_ct_per_kwh": [20.0, 25.0]})
+    analyzer = EnergyPriceAnalyzer(profile)
+    analyzer.update_prices(prices)
+    assert analyzer.find_cheapest_period() == (None, None, None)
 
 
 # Test for Price Update with Mocked Current Time
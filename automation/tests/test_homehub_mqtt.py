@@ -0,0 +1,121 @@
+import threading
+import pytest
+from src.homehub_mqtt import AutomationPubSub, RearmableTimer
+from unittest.mock import MagicMock, patch
+
+
+class RecordingAutomation(AutomationPubSub):
+    def __init__(self, broker_ip:str, name:str):
+        super().__init__(broker_ip, name)
+        self.received = []
+
+    def handle_message(self, topic, payload):
+        self.received.append((topic, payload))
+
+
+@pytest.fixture
+def automation():
+    with patch('paho.mqtt.client.Client'):
+        yield RecordingAutomation(broker_ip='127.0.0.1', name='test')
+
+
+def test_handle_message_must_be_implemented():
+    with patch('paho.mqtt.client.Client'):
+        with pytest.raises(TypeError):
+            AutomationPubSub(broker_ip='127.0.0.1', name='test')
+
+
+def make_message(topic, payload):
+    message = MagicMock()
+    message.topic = topic
+    message.payload = payload
+    return message
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (b'{"state":"ON","linkquality":69}', {"state": "ON", "linkquality": 69}),
+    (b'20', 20),
+    (b'not json', 'not json'),
+    (b'\xff\xfe', '��'),
+])
+def test_on_message_parses_payload(automation, raw, expected):
+    message = make_message('zigbee2mqtt/Bathroom Socket', raw)
+
+    automation._AutomationPubSub__on_message(None, None, message)
+
+    assert automation.received == [('zigbee2mqtt/Bathroom Socket', expected)]
+
+
+def test_on_connect_subscribes_all_topics_at_once(automation):
+    automation._subscribe_to_topics(['zigbee2mqtt/Bathroom Sensor', 'zigbee2mqtt/Bathroom Socket'])
+    client = MagicMock()
+
+    automation.on_connect(client, None, None)
+
+    client.subscribe.assert_called_once()
+    assert sorted(client.subscribe.call_args.args[0]) == [('zigbee2mqtt/Bathroom Sensor', 1),
+                                                          ('zigbee2mqtt/Bathroom Socket', 1)]
+
+
+def test_subscribe_to_topics_deduplicates(automation):
+    automation._subscribe_to_topics(['zigbee2mqtt/Bathroom Sensor'])
+    automation._subscribe_to_topics(['zigbee2mqtt/Bathroom Sensor', 'zigbee2mqtt/Bathroom Socket'])
+
+    assert automation.topics == {'zigbee2mqtt/Bathroom Sensor', 'zigbee2mqtt/Bathroom Socket'}
+
+
+def test_on_connect_without_topics(automation):
+    client = MagicMock()
+
+    automation.on_connect(client, None, None)
+
+    client.subscribe.assert_not_called()
+
+
+def test_read_config(automation, tmp_path):
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("broker: mosquittobroker\n")
+
+    assert automation.read_config(str(config_file)) == {"broker": "mosquittobroker"}
+    assert automation.read_config(str(tmp_path / "missing.yaml")) is None
+
+
+def test_rearmable_timer_fires_once_after_last_start():
+    fired = threading.Event()
+    calls = []
+    timer = RearmableTimer(lambda *args: (calls.append(args), fired.set()))
+
+    timer.start(0.05, args=(1,))
+    timer.start(0.05, args=(2,))
+
+    assert fired.wait(1)
+    assert calls == [(2,)]
+
+
+def test_rearmable_timer_cancel():
+    fired = threading.Event()
+    timer = RearmableTimer(fired.set)
+
+    timer.start(0.05)
+    timer.cancel()
+
+    assert not fired.wait(0.2)
+
+
+def test_rearmable_timer_survives_failing_function():
+    failed = threading.Event()
+    fired = threading.Event()
+
+    def function(fail):
+        if fail:
+            failed.set()
+            raise RuntimeError("boom")
+        fired.set()
+
+    timer = RearmableTimer(function)
+
+    timer.start(0.01, args=(True,))
+    assert failed.wait(1)
+    timer.start(0.01, args=(False,))
+
+    assert fired.wait(1)
@@ -0,0 +1,41 @@
+import pytest
+
+# The Instagram logger runs from its own virtualenv (src/instagram/requirements.txt)
+pytest.importorskip("instaloader")
+pytest.importorskip("influxdb_client")
+pytest.importorskip("dotenv")
+
+from src.instagram.log_followers import is_unchanged, load_last_sample, save_last_sample
+
+
+HEARTBEAT = 6 * 43200
+SAMPLE = {"username": "test", "followers": 100, "followees": 50, "posts": 10}
+LAST_SAMPLE = {**SAMPLE, "ts": 1_000_000}
+
+
+@pytest.mark.parametrize("last_sample, sample, now, expected", [
+    (None, SAMPLE, 1_000_000, False),                                  # nothing written yet
+    (LAST_SAMPLE, SAMPLE, 1_000_000 + 43200, True),                    # same data within the heartbeat
+    (LAST_SAMPLE, {**SAMPLE, "followers": 101}, 1_000_000 + 43200, False),  # data changed
+    (LAST_SAMPLE, SAMPLE, 1_000_000 + HEARTBEAT, False),               # heartbeat elapsed
+])
+def test_is_unchanged(last_sample, sample, now, expected):
+    assert is_unchanged(last_sample, sample, now, HEARTBEAT) is expected
+
+
+def test_load_last_sample_round_trip(tmp_path):
+    state_file = str(tmp_path / "last_sample.json")
+    save_last_sample(state_file, LAST_SAMPLE)
+
+    assert load_last_sample(state_file) == LAST_SAMPLE
+
+
+def test_load_last_sample_missing_file(tmp_path):
+    assert load_last_sample(str(tmp_path / "missing.json")) is None
+
+
+def test_load_last_sample_corrupt_file(tmp_path):
+    state_file = tmp_path / "last_sample.json"
+    state_file.write_text('{"username": "test", "followers"')
+
+    assert load_last_sample(str(state_file)) is None
@@ -3,11 +3,30 @@ from src.towel_heater import TowelHeaterAutomation
 from unittest.mock import patch
 
 
+ROOT_TOPIC = "zigbee2mqtt"
+TOWEL_HEATER = "Bathroom Socket"
+SHORT_CYCLE_TIME = 1
+LONG_CYCLE_TIME = 35*60
+
+TOPIC_SET = f'{ROOT_TOPIC}/{TOWEL_HEATER}/set'
+TOPIC_STATUS = f'{ROOT_TOPIC}/{TOWEL_HEATER}'
+
+State = TowelHeaterAutomation.TowelStateMachine
+
+# Each case starts the heater in start_state, so the cases run independently of each other
+TEST_CASES = [{"start_state": State.IDLE, "trigger_payload":{"state":"ON"}, "expected_status":False, "time_increment": SHORT_CYCLE_TIME, "expected_command": b'{"state":"OFF"}'},
+              {"start_state": State.HEALTH_INDICATION_ON_SLEEP, "trigger_payload":{"state":"OFF"}, "expected_status":True, "time_increment": SHORT_CYCLE_TIME, "expected_command": b'{"state":"ON"}'},
+              {"start_state": State.HEALTH_INDICATION_OFF_SLEEP, "trigger_payload":{"state":"ON"}, "expected_status":False, "time_increment": LONG_CYCLE_TIME, "expected_command": b'{"state":"OFF"}'},
+              {"start_state": State.HEATING, "trigger_payload":{"state":"ON"}, "expected_status":None, "time_increment": SHORT_CYCLE_TIME, "expected_command": None},
+              {"start_state": State.HEATING, "trigger_payload":{"state":"OFF"}, "expected_status":None, "time_increment": SHORT_CYCLE_TIME, "expected_command": None},
+              {"start_state": State.IDLE, "trigger_payload":{"state":"ON"}, "expected_status":False, "time_increment": SHORT_CYCLE_TIME, "expected_command": b'{"state":"OFF"}'},]
+
+
 
 @pytest.fixture
 def mock_time():
-    with patch('time.time') as mock_time:
-        mock_time.return_value = 0  # starting time
+    with patch('time.monotonic') as mock_time:
+        mock_time.return_value = 100  # starting time
         yield mock_time
 
 
@@ -19,58 +38,37 @@ def mock_delayed_heater():
         yield mock
 
 
-
-def test_delayed_towel_heater_behavior(mock_delayed_heater, mock_time):
-    ROOT_TOPIC = "zigbee2mqtt"
-    TOWEL_HEATER = "Bathroom Socket"
-    SHORT_CYCLE_TIME = 1
-    LONG_CYCLE_TIME = 35*60
-
-    test_cases = [{"trigger_payload":{"state":"ON"}, "expected_status":False, "time_increment": SHORT_CYCLE_TIME, "expected_command": '{"state":"OFF"}'},
-                  {"trigger_payload":{"state":"OFF"}, "expected_status":True, "time_increment": SHORT_CYCLE_TIME, "expected_command": '{"state":"ON"}'},
-                  {"trigger_payload":{"state":"ON"}, "expected_status":False, "time_increment": LONG_CYCLE_TIME, "expected_command": '{"state":"OFF"}'},
-                  {"trigger_payload":{"state":"ON"}, "expected_status":None, "time_increment": SHORT_CYCLE_TIME, "expected_command": None},
-                  {"trigger_payload":{"state":"OFF"}, "expected_status":None, "time_increment": SHORT_CYCLE_TIME, "expected_command": None},
-                  {"trigger_payload":{"state":"ON"}, "expected_status":False, "time_increment": SHORT_CYCLE_TIME, "expected_command": '{"state":"OFF"}'},]
-    
-    topic_set = f'{ROOT_TOPIC}/{TOWEL_HEATER}/set'
-    topic_status = f'{ROOT_TOPIC}/{TOWEL_HEATER}'
-
-
-
+@pytest.fixture
+def towel_heater(mock_delayed_heater):
     with patch('paho.mqtt.client.Client') as MockClient:
         mock_client = MockClient.return_value
         towel_heater = TowelHeaterAutomation(broker_ip='127.0.0.1', name='test')
         towel_heater.client = mock_client
+        yield towel_heater, mock_client
 
-        mock_time.return_value += 100
-
-        for test_case in test_cases:            
 
-            towel_heater.handle_message(topic_status, test_case["trigger_payload"])
-            # Ensure delayed_towel_heater was called with expected arguments
-            if test_case["expected_status"] != None:
-                mock_delayed_heater.assert_called_with(test_case["expected_status"], test_case["time_increment"])
-                mock_time.return_value += test_case["time_increment"]
-                towel_heater.set_towel_heater(test_case["expected_status"])
 
-                # Test the effects of what should happen after delayed_towel_heater
-                # For instance, check if the correct MQTT message was published
-                print("Assert call")
-                mock_client.publish.assert_called_with(topic_set, test_case["expected_command"])
-                
+@pytest.mark.parametrize("case", TEST_CASES)
+def test_delayed_towel_heater_behavior(towel_heater, mock_delayed_heater, mock_time, case):
+    towel_heater, mock_client = towel_heater
+    towel_heater._state = case["start_state"]
 
-            else:
-                print("Assert NOT call")
-                mock_delayed_heater.assert_not_called()
-                mock_time.return_value += test_case["time_increment"]
+    towel_heater.handle_message(TOPIC_STATUS, case["trigger_payload"])
+    # Ensure delayed_towel_heater was called with expected arguments
+    if case["expected_status"] is not None:
+        mock_delayed_heater.assert_called_with(case["expected_status"], case["time_increment"])
+        mock_time.return_value += case["time_increment"]
+        towel_heater.set_towel_heater(case["expected_status"])
 
-            mock_delayed_heater.reset_mock()
-            
+        # Test the effects of what should happen after delayed_towel_heater
+        # For instance, check if the correct MQTT message was published
+        mock_client.publish.assert_called_with(TOPIC_SET, case["expected_command"])
 
-            
+    else:
+        mock_delayed_heater.assert_not_called()
+        mock_time.return_value += case["time_increment"]
 
 
 
 if __name__ == '__main__':
-    assert("Not implemented")
\ No newline at end of file
+    assert("Not implemented")
@@ -0,0 +1,51 @@
+import os
+import sys
+import pytest
+import paho.mqtt.client as paho
+from unittest.mock import patch
+
+# ventilation_control imports homehub_mqtt as a top-level module, like when it runs as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from src.ventilation_control import VentilationAutomation
+
+
+SENSOR_TOPIC = "zigbee2mqtt/Bathroom Sensor"
+
+
+@pytest.fixture
+def ventilation():
+    with patch('paho.mqtt.client.Client') as MockClient:
+        mock_client = MockClient.return_value
+        mock_client.publish.return_value.rc = paho.MQTT_ERR_SUCCESS
+        ventilation = VentilationAutomation(broker_ip='127.0.0.1', name='test')
+        ventilation.client = mock_client
+        yield ventilation, mock_client
+
+
+def test_same_band_publishes_once(ventilation):
+    ventilation, mock_client = ventilation
+
+    ventilation.handle_message(SENSOR_TOPIC, {"humidity": 86})
+    ventilation.handle_message(SENSOR_TOPIC, {"humidity": 90})
+
+    mock_client.publish.assert_called_once_with("itho/cmd", b'242')
+
+
+def test_band_change_publishes(ventilation):
+    ventilation, mock_client = ventilation
+
+    ventilation.handle_message(SENSOR_TOPIC, {"humidity": 86})
+    ventilation.handle_message(SENSOR_TOPIC, {"humidity": 60})
+
+    assert [c.args for c in mock_client.publish.call_args_list] == [("itho/cmd", b'242'), ("itho/cmd", b'20')]
+
+
+def test_failed_publish_is_retried(ventilation):
+    ventilation, mock_client = ventilation
+    mock_client.publish.return_value.rc = paho.MQTT_ERR_NO_CONN
+
+    ventilation.handle_message(SENSOR_TOPIC, {"humidity": 86})
+    mock_client.publish.return_value.rc = paho.MQTT_ERR_SUCCESS
+    ventilation.handle_message(SENSOR_TOPIC, {"humidity": 86})
+
+    assert mock_client.publish.call_count == 2
@@ -4,12 +4,23 @@ import json
 import os
 import subprocess
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
 import logging
 import logging.handlers
 import sys
 import re
+import textwrap
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from packaging.version import Version, InvalidVersion
+from packaging.version import Version
+
+try:
+    # orjson parses the raw response bytes directly and is considerably faster
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 # Configure logging
 LOG_FILENAME = "docker_check.log"
@@ -33,21 +44,40 @@ ch.setFormatter(console_formatter)
 logger.addHandler(ch)
 
 # Optional: set Docker Hub credentials as environment variables
-DOCKER_HUB_USERNAME = os.environ.get("DOCKER_HUB_USERNAME", "antonio.fontoura@gmail.com")
-DOCKER_HUB_PASSWORD = os.environ.get("DOCKER_HUB_PASSWORD", "Depress-Imply-Ducking1")
+DOCKER_HUB_USERNAME = os.environ.get("DOCKER_HUB_USERNAME")
+DOCKER_HUB_PASSWORD = os.environ.get("DOCKER_HUB_PASSWORD")
 
 # Default threshold in months (approx. 3 months)
 threshold_months = 3
 
+# Containers checked concurrently; the work is almost entirely waiting on Docker Hub
+MAX_WORKERS = 8
+
+# One keep-alive pool for all Docker Hub calls, so pages and repos reuse the TLS connection
+HTTP_TIMEOUT = 10
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_maxsize=MAX_WORKERS,
+                                      max_retries=Retry(total=3, backoff_factor=0.3,
+                                                        status_forcelist=(429, 500, 502, 503, 504))))
+
+# repo[:tag][@digest]; a tag never contains '/', so a registry port stays part of the repo
+IMAGE_REF_RE = re.compile(r"(?P<repo>[^@]+?)(?::(?P<tag>\w[\w.-]{0,127}))?(?:@(?P<digest>.+))?")
+
+# Plain numeric release tags, optionally 'v'-prefixed (e.g. 1.25, v2.3.1); surrounding whitespace is ignored
+STABLE_VERSION_RE = re.compile(r"\s*v?(\d+(?:\.\d+){0,3})\s*")
+
+@lru_cache(maxsize=4096)
 def parse_datetime(dt_str):
     """
     Safely parse an ISO8601-like string (with or without 'Z') to a datetime object.
-    Returns None if parsing fails.
+    Returns None if parsing fails. Results are cached, as images built together
+    share the same timestamps.
     """
     if not dt_str:
         return None
-    # Replace trailing 'Z' with '+00:00' if present
-    dt_str = dt_str.replace("Z", "+00:00")
+    # Python 3.11+ accepts the trailing 'Z' (and nanosecond fractions) natively
+    if sys.version_info < (3, 11) and dt_str.endswith("Z"):
+        dt_str = dt_str[:-1] + "+00:00"
     try:
         return datetime.fromisoformat(dt_str)
     except ValueError:
@@ -69,12 +99,14 @@ def should_update(local_created_str, remote_created_str, months=3):
     diff = (remote_dt - local_dt).days
     return diff > threshold_days
 
+@lru_cache(maxsize=256)
 def get_repo_tag(image_full):
-    if ":" in image_full:
-        repo, tag = image_full.rsplit(":", 1)
-    else:
-        repo, tag = image_full, "latest"
-    return repo, tag
+    """
+    Split an image reference into (repo, tag), defaulting the tag to 'latest'.
+    Handles registry ports (host:5000/repo) and digests (repo@sha256:...).
+    """
+    match = IMAGE_REF_RE.fullmatch(image_full)
+    return match["repo"], match["tag"] or "latest"
 
 def get_docker_hub_token(username, password):
     if not username or not password:
@@ -83,15 +115,22 @@ def get_docker_hub_token(username, password):
     url = "https://hub.docker.com/v2/users/login/"
     payload = {"username": username, "password": password}
     try:
-        resp = requests.post(url, json=payload)
+        resp = SESSION.post(url, json=payload, timeout=HTTP_TIMEOUT)
         resp.raise_for_status()
-        token = resp.json().get("token")
+        token = json_loads(resp.content).get("token")
         logger.debug("Authenticated with Docker Hub successfully.")
         return token
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError) as e:
         logger.warning(f"Failed to authenticate with Docker Hub: {e}")
         return None
 
+@lru_cache(maxsize=None)
+def get_token():
+    """
+    Log in to Docker Hub the first time a token is needed and reuse it afterwards.
+    """
+    return get_docker_hub_token(DOCKER_HUB_USERNAME, DOCKER_HUB_PASSWORD)
+
 def normalize_repo(repo):
     if repo.startswith("lscr.io/"):
         # Switch to Docker Hub name for LinuxServer images
@@ -103,17 +142,41 @@ def get_local_image_created_date(image_full):
     Returns the locally stored image's creation date (ISO string) if available,
     or None if the image doesn't exist locally under that reference.
     """
-    try:
-        cmd = ["docker", "image", "inspect", image_full, "--format", "{{.Created}}"]
-        output = subprocess.check_output(cmd, universal_newlines=True).strip()
-        return output if output else None
-    except subprocess.CalledProcessError:
+    cmd = ["docker", "image", "inspect", image_full, "--format", "{{.Created}}"]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
         return None
+    output = proc.stdout.strip()
+    return output if output else None
 
-def get_latest_version_tag(repo, token=None, pages=2):
+def get_local_image_created_dates(images):
+    """
+    Returns a dict mapping each image reference to its local creation date (or None),
+    using a single `docker image inspect` call for all of them.
+    """
+    if not images:
+        return {}
+    cmd = ["docker", "image", "inspect", *images, "--format", "{{.Created}}"]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        # Some image is missing locally, so the output no longer lines up; inspect one by one
+        return {image: get_local_image_created_date(image) for image in images}
+    # One line per image, in the order they were given
+    return {image: created or None for image, created in zip(images, proc.stdout.splitlines())}
+
+def is_stable_numeric_tag(tag):
+    """
+    Return the Version of a plain numeric release tag (e.g. '1.25', 'v2.3.1'), or None.
+    """
+    match = STABLE_VERSION_RE.fullmatch(tag)
+    # The captured numeric part is always a valid version
+    return Version(match[1]) if match else None
+
+def get_latest_version_tag(repo, pages=2):
     """
     Pull multiple pages of tags from Docker Hub, ignoring non-semver or special tags,
     then return the highest semver tag and its 'last_updated' date.
+    Requests are anonymous unless Docker Hub answers 401.
     """
     if "/" not in repo:
         repo = f"library/{repo}"
@@ -121,8 +184,6 @@ def get_latest_version_tag(repo, token=None, pages=2):
     repo = normalize_repo(repo)
 
     headers = {}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
 
     page = 1
     found_tags = []
@@ -133,10 +194,15 @@ def get_latest_version_tag(repo, token=None, pages=2):
             f"?page_size=50&page={page}&ordering=last_updated"
         )
         try:
-            r = requests.get(url, headers=headers)
+            r = SESSION.get(url, headers=headers, timeout=HTTP_TIMEOUT)
+            if r.status_code == 401 and not headers:
+                token = get_token()
+                if token:
+                    headers["Authorization"] = f"Bearer {token}"
+                    r = SESSION.get(url, headers=headers, timeout=HTTP_TIMEOUT)
             r.raise_for_status()
-            data = r.json()
-        except requests.RequestException as e:
+            data = json_loads(r.content)
+        except (requests.RequestException, ValueError) as e:
             logger.warning(f"Failed to fetch tags for {repo}: {e}")
             break
 
@@ -148,15 +214,10 @@ def get_latest_version_tag(repo, token=None, pages=2):
             name = result.get("name", "")
             last_updated = result.get("last_updated", "")
 
-            # Skip non-release or dev-like tags
-            if any(x in name for x in ["latest", "dev", "beta", "rc"]):
-                continue
-
-            try:
-                ver = Version(name)
+            # Skip non-release or dev-like tags (latest, dev, beta, rc, -alpine, ...)
+            ver = is_stable_numeric_tag(name)
+            if ver is not None:
                 found_tags.append((ver, name, last_updated))
-            except InvalidVersion:
-                pass
 
         next_page = data.get("next")
         if not next_page:
@@ -167,58 +228,82 @@ def get_latest_version_tag(repo, token=None, pages=2):
         return None, None
 
     # Highest semantic version
-    found_tags.sort(key=lambda x: x[0], reverse=True)
-    _, highest_tag, last_updated = found_tags[0]
+    _, highest_tag, last_updated = max(found_tags, key=lambda x: x[0])
     return highest_tag, last_updated
 
+def write_json_rows(rows, f):
+    """
+    Write rows to `f` as a JSON array laid out like json.dump(rows, f, indent=2),
+    one row at a time instead of encoding the whole list at once.
+    """
+    separator = "[\n"
+    for row in rows:
+        f.write(separator)
+        f.write(textwrap.indent(json.dumps(row, indent=2), "  "))
+        separator = ",\n"
+    f.write("[]" if separator == "[\n" else "\n]")
+
+def check_container(container_id, image_full, created_dates, latest_versions):
+    """
+    Compare a running container's image against the newest version on Docker Hub.
+    `created_dates` maps each image to its local creation date and
+    `latest_versions` maps each repo to its (latest_tag, last_updated) pair.
+    """
+    repo, tag = get_repo_tag(image_full)
+    current_version = tag
+
+    logger.debug(f"Checking container={container_id}, repo={repo}, tag={tag}")
+
+    # Local creation date (ISO string)
+    local_created_date = created_dates[image_full]
+
+    # Remote latest semantic version info
+    latest_tag, updated_date = latest_versions[repo]
+
+    # Decide if we should update
+    # Compare local_created_date vs. updated_date
+    update_needed = should_update(local_created_date, updated_date, months=threshold_months)
+
+    return {
+        "container_id": container_id,
+        "image": repo,
+        "current_tag": current_version,
+        "current_image_created_date": local_created_date,
+        "latest_tag": latest_tag,
+        "latest_release_date": updated_date,
+        "update": update_needed
+    }
+
 def main():
     logger.info("Starting Docker container version check.")
 
-    token = get_docker_hub_token(DOCKER_HUB_USERNAME, DOCKER_HUB_PASSWORD)
-    
     # List all running containers
     cmd = ["docker", "ps", "--format", "{{.ID}} {{.Image}}"]
     try:
-        output = subprocess.check_output(cmd, universal_newlines=True)
+        output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to run docker ps: {e}")
         return
 
-    lines = output.strip().split("\n")
-    results = []
-
-    for line in lines:
-        if not line.strip():
-            continue
-        container_id, image_full = line.strip().split()
-        repo, tag = get_repo_tag(image_full)
-        current_version = tag
-
-        logger.debug(f"Checking container={container_id}, repo={repo}, tag={tag}")
+    containers = [line.strip().split() for line in output.strip().split("\n") if line.strip()]
 
-        # Local creation date (ISO string)
-        local_created_date = get_local_image_created_date(image_full)
+    images = list(dict.fromkeys(image_full for _, image_full in containers))
+    created_dates = get_local_image_created_dates(images)
 
-        # Remote latest semantic version info
-        latest_tag, updated_date = get_latest_version_tag(repo, token=token)
+    # Containers running the same image share a single Docker Hub lookup
+    repos = list(dict.fromkeys(get_repo_tag(image_full)[0] for image_full in images))
 
-        # Decide if we should update
-        # Compare local_created_date vs. updated_date
-        update_needed = should_update(local_created_date, updated_date, months=threshold_months)
+    # map() hands the results back in input order
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        latest_versions = dict(zip(repos, executor.map(get_latest_version_tag, repos)))
 
-        results.append({
-            "container_id": container_id,
-            "image": repo,
-            "current_tag": current_version,
-            "current_image_created_date": local_created_date,
-            "latest_tag": latest_tag,
-            "latest_release_date": updated_date,
-            "update": update_needed
-        })
+    # Build every row before opening the file, so a failure leaves the previous report intact
+    results = [check_container(container_id, image_full, created_dates, latest_versions)
+               for container_id, image_full in containers]
 
     try:
         with open("docker_versions.json", "w") as f:
-            json.dump(results, f, indent=2)
+            write_json_rows(results, f)
         logger.info("docker_versions.json generated successfully.")
     except IOError as e:
         logger.error(f"Failed to write docker_versions.json: {e}")